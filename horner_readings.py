@@ -2,127 +2,128 @@
 Horner Bible Reading Plan
 """
 
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from argparse import ArgumentParser
-from collections.abc import Sequence
-from collections import UserList
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import itertools
 import json
 import os
-
-from meaningless import WebExtractor
-import arrow
-import yaml
-
-
-BIBLE_YAML = """
----
-readings_start: 0
-readings_end: 364
-list_1:
-  - Matthew, 28
-  - Mark, 16
-  - Luke, 24
-  - John, 21
-list_2:
-  - Genesis, 50
-  - Exodus, 40
-  - Leviticus, 27
-  - Numbers, 36
-  - Deuteronomy, 34
-list_3:
-  - Romans, 16
-  - 1 Corinthians, 16
-  - 2 Corinthians, 13
-  - Galatians, 6
-  - Ephesians, 6
-  - Philippians, 4
-  - Colossians, 4
-  - Hebrews, 13
-list_4:
-  - 1 Thessalonians, 5
-  - 2 Thessalonians, 3
-  - 1 Timothy, 6
-  - 2 Timothy, 4
-  - Titus, 3
-  - Philemon, 1
-  - James, 5
-  - 1 Peter, 5
-  - 2 Peter, 3
-  - 1 John, 5
-  - 2 John, 1
-  - 3 John, 1
-  - Jude, 1
-  - Revelation, 22
-list_5:
-  - Job, 42
-  - Ecclesiastes, 12
-  - Song of Solomon, 8
-list_6:
-  - Psalms, 150
-list_7:
-  - Proverbs, 31
-list_8:
-  - Joshua, 24
-  - Judges, 21
-  - Ruth, 4
-  - 1 Samuel, 31
-  - 2 Samuel, 24
-  - 1 Kings, 22
-  - 2 Kings, 25
-  - 1 Chronicles, 29
-  - 2 Chronicles, 36
-  - Ezra, 10
-  - Nehemiah, 13
-  - Esther, 10
-list_9:
-  - Isaiah, 66
-  - Jeremiah, 52
-  - Lamentations, 5
-  - Ezekiel, 48
-  - Daniel, 12
-  - Hosea, 14
-  - Joel, 3
-  - Amos, 9
-  - Obadiah, 1
-  - Jonah, 4
-  - Micah, 7
-  - Nahum, 3
-  - Habakkuk, 3
-  - Zephaniah, 3
-  - Haggai, 2
-  - Zechariah, 14
-  - Malachi, 4
-list_10:
-  - Acts, 28
-"""
-
-class BibleChapterList(UserList):
-    """A List to hold a list of BibleChapter() instances"""
-
-    def __init__(self, data=None):
-        if data is None:
-            data = []
-        elif not isinstance(data, Sequence):
-            raise ValueError("BibleChapterList() must get a sequence / list of BibleChapter() instances as the argument")
-        super().__init__(data)
-
-        self.data = data
-
-    def __str__(self):
-        return f"<BibleChapterList {self.data}>"
-
-    def __repr__(self):
-        return self.__str__()
+import sys
+import tempfile
+
+
+BIBLE_CONFIG = {
+    "readings_start": 0,
+    "readings_end": 364,
+    "list_1": (
+        "Matthew, 28",
+        "Mark, 16",
+        "Luke, 24",
+        "John, 21",
+    ),
+    "list_2": (
+        "Genesis, 50",
+        "Exodus, 40",
+        "Leviticus, 27",
+        "Numbers, 36",
+        "Deuteronomy, 34",
+    ),
+    "list_3": (
+        "Romans, 16",
+        "1 Corinthians, 16",
+        "2 Corinthians, 13",
+        "Galatians, 6",
+        "Ephesians, 6",
+        "Philippians, 4",
+        "Colossians, 4",
+        "Hebrews, 13",
+    ),
+    "list_4": (
+        "1 Thessalonians, 5",
+        "2 Thessalonians, 3",
+        "1 Timothy, 6",
+        "2 Timothy, 4",
+        "Titus, 3",
+        "Philemon, 1",
+        "James, 5",
+        "1 Peter, 5",
+        "2 Peter, 3",
+        "1 John, 5",
+        "2 John, 1",
+        "3 John, 1",
+        "Jude, 1",
+        "Revelation, 22",
+    ),
+    "list_5": (
+        "Job, 42",
+        "Ecclesiastes, 12",
+        "Song of Solomon, 8",
+    ),
+    "list_6": (
+        "Psalms, 150",
+    ),
+    "list_7": (
+        "Proverbs, 31",
+    ),
+    "list_8": (
+        "Joshua, 24",
+        "Judges, 21",
+        "Ruth, 4",
+        "1 Samuel, 31",
+        "2 Samuel, 24",
+        "1 Kings, 22",
+        "2 Kings, 25",
+        "1 Chronicles, 29",
+        "2 Chronicles, 36",
+        "Ezra, 10",
+        "Nehemiah, 13",
+        "Esther, 10",
+    ),
+    "list_9": (
+        "Isaiah, 66",
+        "Jeremiah, 52",
+        "Lamentations, 5",
+        "Ezekiel, 48",
+        "Daniel, 12",
+        "Hosea, 14",
+        "Joel, 3",
+        "Amos, 9",
+        "Obadiah, 1",
+        "Jonah, 4",
+        "Micah, 7",
+        "Nahum, 3",
+        "Habakkuk, 3",
+        "Zephaniah, 3",
+        "Haggai, 2",
+        "Zechariah, 14",
+        "Malachi, 4",
+    ),
+    "list_10": (
+        "Acts, 28",
+    ),
+}
+
+@functools.lru_cache(maxsize=8)
+def get_web_extractor(translation="ESV"):
+    """Return a WebExtractor() for translation, reusing it across chapters"""
+
+    # Import here so --year does not pay for loading meaningless
+    from meaningless import WebExtractor
+
+    return WebExtractor(translation=translation)
 
 class BibleChapter:
     """A class to represent a Bible Chapter"""
+    __slots__ = ("book", "chapter")
+
     def __init__(self, book="", chapter=-1):
         if book == "":
             raise ValueError("BibleChapter() book must be specified")
         if chapter==-1:
             raise ValueError("BibleChapter() chapter must be specified")
         self.book = book
-        self.chapter = int(str(chapter).strip())
+        self.chapter = chapter if type(chapter) is int else int(str(chapter).strip())
 
     def __str__(self):
         return f"<{self.book} {self.chapter}>"
@@ -130,11 +131,45 @@ class BibleChapter:
     def __repr__(self):
         return self.__str__()
 
+    @classmethod
+    def _unchecked(cls, book, chapter):
+        """Build a BibleChapter from trusted BIBLE_CONFIG data without validating it"""
+        obj = cls.__new__(cls)
+        obj.book = book
+        obj.chapter = chapter
+        return obj
+
+    def get_cache_filepath(self, translation="ESV"):
+        """Return the path of this BibleChapter in ~/.horner_bible_readings_cache/"""
+
+        cache_dirpath = os.path.expanduser(f"~/.horner_bible_readings_cache/{translation}")
+        return os.path.join(cache_dirpath, f"{self.book.replace(' ', '_')}_{self.chapter}.txt")
+
     def get_url(self, translation="ESV"):
-        """Download and return the BibleChapter from BibleGateway.com"""
+        """Download and return the BibleChapter from BibleGateway.com, caching it in ~/.horner_bible_readings_cache/"""
+
+        cache_filepath = self.get_cache_filepath(translation=translation)
+        cache_dirpath = os.path.dirname(cache_filepath)
+
+        if os.path.exists(cache_filepath):
+            with open(cache_filepath, encoding="utf-8") as fh:
+                passage = fh.read()
+        else:
+            bible = get_web_extractor(translation=translation)
+            passage = bible.get_chapter(self.book, self.chapter)
+
+            # Write to a per-process temp file first so an interrupted run never leaves a partial passage cached
+            os.makedirs(cache_dirpath, exist_ok=True)
+            fh = tempfile.NamedTemporaryFile('w', encoding="utf-8", dir=cache_dirpath, suffix=".tmp", delete=False)
+            try:
+                with fh:
+                    fh.write(passage)
+                os.replace(fh.name, cache_filepath)
+            except BaseException:
+                # Don't leave orphaned temp files behind if the write fails
+                os.remove(fh.name)
+                raise
 
-        bible = WebExtractor(translation=translation)
-        passage = bible.get_chapter(self.book, self.chapter)
         return f"""\n{self.book} {self.chapter}\n{passage}\n"""
 
 class JsonBookmark:
@@ -148,7 +183,7 @@ class JsonBookmark:
             self.create_bookmark()
 
         with open(self.filepath) as fh:
-            self.bookmark = json.load(fh)
+            self.bookmark = json.loads(fh.read())
 
         # Ensure we have updated the bookmark to the most recent timestamp
         self.update_bookmark()
@@ -167,35 +202,37 @@ class JsonBookmark:
         if self.args.translation == "":
             raise ValueError("Cannot save translation preferences without a translation.  Use -t from the CLI")
 
-        bookmark = {"day_index_number": 0, "last_updated": str(arrow.now()), "translation": self.args.translation}
+        bookmark = {"day_index_number": 0, "last_updated": datetime.now().astimezone().isoformat(), "translation": self.args.translation}
 
         with open(self.filepath, 'w') as fh:
-            json.dump(bookmark, fh)
+            fh.write(json.dumps(bookmark))
 
     def update_bookmark(self):
         """If it's past midnight since updating the bookmark, update the bookmark and roll the day index to zero after 365 readings"""
 
         # Strip hh:mm:ss from last_updated timestamp
-        update_date = self.bookmark["last_updated"].split("T")[0]
+        update_date = date.fromisoformat(self.bookmark["last_updated"][:10])
+
+        # Snapshot the bookmark so unchanged settings are not rewritten
+        old_bookmark = dict(self.bookmark)
 
         # If past midnight since the last reading, bump the day index number...
-        now = arrow.now()
-        days = (now - arrow.get(update_date)).days
-        if (args.save_settings is True) or (days > 0):
-            if (days > 0):
-                if self.day_index_number < 365:
-                    self.bookmark["day_index_number"] += 1
-                else:
-                    self.bookmark["day_index_number"] = 0
+        now = datetime.now().astimezone()
+        days = (now.date() - update_date).days
+        if (days > 0):
+            # Day indexes run from 0 to 364; older bookmarks may still hold 365...
+            self.bookmark["day_index_number"] = (min(self.day_index_number, 364) + 1) % 365
 
-            # Update translation in the settings file if --save_settings is used
-            if args.save_settings is True:
-                self.bookmark["translation"] = self.args.translation
+        # Update translation in the settings file if --save_settings is used
+        if self.args.save_settings is True:
+            self.bookmark["translation"] = self.args.translation
 
-            self.bookmark["last_updated"] = str(now)
+        # Only rewrite the settings file if the bookmark actually changed...
+        if self.bookmark != old_bookmark:
+            self.bookmark["last_updated"] = now.isoformat()
 
             with open(self.filepath, 'w') as fh:
-                json.dump(self.bookmark, fh)
+                fh.write(json.dumps(self.bookmark))
 
 def parse_args():
     """Parse the command-line arguments"""
@@ -217,109 +254,70 @@ def parse_args():
     return parser.parse_args()
 
 
-def get_chapter_readings_from_yaml(items):
+def get_chapter_readings_from_config(items):
     """
-    Returns a list of all Bible chapter readings for a given list of books in the yaml config.
+    Returns a tuple of all Bible chapter readings (as "Book N" strings) for a given list of books in BIBLE_CONFIG.
     """
 
-    readings_list = BibleChapterList()
+    readings_list = []
 
     # Loop through list:
     for item in items:
 
         # Split into book and total chapters:
-        bible_book, total_chapters = item.split(", ")
-
-        # Make chapters an integer:
-        total_chapters = int(total_chapters)
+        bible_book, total_chapters = item.split(", ", 1)
 
-        # Keep looping through available chapters from books in list:
-        for chapter in range(1, total_chapters + 1):
+        # Append each book and chapter (as string) to list,
+        # giving us the full list of readings for this list:
+        readings_list.extend([f"{bible_book} {chapter}" for chapter in range(1, int(total_chapters) + 1)])
 
-            # Append book and chapter (as string) to list,
-            # giving us the full list of readings for this list:
-            readings_list.append(BibleChapter(book=bible_book, chapter=chapter))
+    return tuple(readings_list)
 
-    return readings_list
 
+def get_book_lists_from_config():
+    """
+    Returns a tuple of the ten book lists in BIBLE_CONFIG.
+    """
 
-def get_book_lists_from_yaml_config():
-
-    # Read the embedded global yaml string...
-    config = yaml.safe_load(BIBLE_YAML)
+    # Load each list of Bible books from the config:
+    return tuple(BIBLE_CONFIG[f"list_{number}"] for number in range(1, 11))
 
-    # Configuration variables:
-    readings_start = config["readings_start"]
-    readings_end = config["readings_end"]
+@functools.lru_cache(maxsize=1)
+def build_readings():
+    """
+    Returns a tuple of the ten chapter reading lists; built once and cached.
+    """
 
-    # Load each list of Bible books from the yaml config:
-    list_1 = config["list_1"]
-    list_2 = config["list_2"]
-    list_3 = config["list_3"]
-    list_4 = config["list_4"]
-    list_5 = config["list_5"]
-    list_6 = config["list_6"]
-    list_7 = config["list_7"]
-    list_8 = config["list_8"]
-    list_9 = config["list_9"]
-    list_10 = config["list_10"]
-    return  (list_1, list_2, list_3, list_4, list_5, list_6, list_7, list_8, list_9, list_10)
+    # Build the readings for each list of books:
+    return tuple(get_chapter_readings_from_config(book_list) for book_list in get_book_lists_from_config())
 
-def build_readings():
+@functools.lru_cache(maxsize=1)
+def build_year_of_readings():
+    """
+    Returns a tuple of 365 daily rows, each holding that day's ten chapter readings.
+    """
 
-    lists = get_book_lists_from_yaml_config()
-
-    # Create empty lists to populate with readings:
-    readings_list_1 = get_chapter_readings_from_yaml(lists[0])
-    readings_list_2 = get_chapter_readings_from_yaml(lists[1])
-    readings_list_3 = get_chapter_readings_from_yaml(lists[2])
-    readings_list_4 = get_chapter_readings_from_yaml(lists[3])
-    readings_list_5 = get_chapter_readings_from_yaml(lists[4])
-    readings_list_6 = get_chapter_readings_from_yaml(lists[5])
-    readings_list_7 = get_chapter_readings_from_yaml(lists[6])
-    readings_list_8 = get_chapter_readings_from_yaml(lists[7])
-    readings_list_9 = get_chapter_readings_from_yaml(lists[8])
-    readings_list_10 = get_chapter_readings_from_yaml(lists[9])
-
-    # Combine each list:
-    all_chapter_lists = (
-        readings_list_1,
-        readings_list_2,
-        readings_list_3,
-        readings_list_4,
-        readings_list_5,
-        readings_list_6,
-        readings_list_7,
-        readings_list_8,
-        readings_list_9,
-        readings_list_10,
-    )
-    return all_chapter_lists
+    # Cycle through each list so the rows need no per-day modulo arithmetic...
+    cycled_lists = (itertools.cycle(chapter_list) for chapter_list in build_readings())
+    return tuple(itertools.islice(zip(*cycled_lists), 365))
 
 def print_year_of_readings():
     """Print daily readings in order for the entire year"""
-    all_chapter_lists = build_readings()
-    # Loop through readings:
-    for i in range(0, 365):
-
-        # Count the day number we are on:
-        day = i + 1
-
-        # Print the readings:
-        print(
-            day,
-            all_chapter_lists[0][i % len(all_chapter_lists[0])],
-            all_chapter_lists[1][i % len(all_chapter_lists[1])],
-            all_chapter_lists[2][i % len(all_chapter_lists[2])],
-            all_chapter_lists[3][i % len(all_chapter_lists[3])],
-            all_chapter_lists[4][i % len(all_chapter_lists[4])],
-            all_chapter_lists[5][i % len(all_chapter_lists[5])],
-            all_chapter_lists[6][i % len(all_chapter_lists[6])],
-            all_chapter_lists[7][i % len(all_chapter_lists[7])],
-            all_chapter_lists[8][i % len(all_chapter_lists[8])],
-            all_chapter_lists[9][i % len(all_chapter_lists[9])],
-            sep=", ",
-        )
+    lines = []
+    # Loop through readings, counting the day number we are on:
+    for day, row in enumerate(build_year_of_readings(), 1):
+
+        # Buffer the readings:
+        lines.append(f"{day}, " + ", ".join(row))
+
+    # Print the whole year with a single write, bypassing the text layer where stdout has a byte buffer:
+    output = "\n".join(lines) + "\n"
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None or os.linesep != "\n":
+        sys.stdout.write(output)
+    else:
+        sys.stdout.flush()
+        buffer.write(output.encode(sys.stdout.encoding))
 
 def print_todays_readings(args):
     all_chapter_lists = build_readings()
@@ -339,6 +337,13 @@ def print_todays_readings(args):
                 all_chapter_lists[8][day_index_number % len(all_chapter_lists[8])],
                 all_chapter_lists[9][day_index_number % len(all_chapter_lists[9])],)
 
+    # Only build BibleChapter() instances for today's readings
+    bible_chapters = []
+    for reading in readings:
+        book, chapter = reading.rsplit(" ", 1)
+        bible_chapters.append(BibleChapter._unchecked(book, int(chapter)))
+    readings = tuple(bible_chapters)
+
     if args.translation != "" and args.translation != bookmark.translation:
         translation = args.translation
     else:
@@ -346,8 +351,18 @@ def print_todays_readings(args):
 
     print("Translation:", translation)
     print("TODAY", readings)
-    for bible_chapter in readings:
-        print(bible_chapter.get_url(translation=translation))
+
+    # Build the shared extractor before the threads start, but only if a chapter must be downloaded...
+    if not all(os.path.exists(bible_chapter.get_cache_filepath(translation=translation)) for bible_chapter in readings):
+        get_web_extractor(translation=translation)
+
+    # Fetch all chapters concurrently...
+    with ThreadPoolExecutor(max_workers=len(readings)) as executor:
+        passages = executor.map(lambda bible_chapter: bible_chapter.get_url(translation=translation), readings)
+
+        # Print the passages in reading order:
+        for passage in passages:
+            print(passage)
 
 
 if __name__=="__main__":